@@ -7,12 +7,19 @@ HID通信监控工具 - 用于捕获设备与应用之间的通信
 """
 
 import hid
+import io
+import threading
 import time
 import sys
 from collections import defaultdict
 
+import numpy as np
+
+from hid_utils import read_feature_report
+
 # 你的设备路径
 DEVICE_PATH = b"\\\\?\\HID#VID_3151&PID_5007&MI_02#8&512c24e&0&0000#{4d1e55b2-f16f-11cf-88cb-001111000030}"
+DEVICE_PATH_STR = DEVICE_PATH.decode('utf-8', errors='replace')
 
 # 要监控的报告ID列表
 MONITOR_REPORTS = [
@@ -23,10 +30,67 @@ MONITOR_REPORTS = [
 
 FEATURE_LENGTH = 64
 
+# 每隔这么多轮重新探测一次全部Report ID，以便发现新出现的报告
+RESCAN_EVERY = 120
+
+
+# 预生成的十六进制查找表，Python < 3.8 没有 bytes.hex(sep) 时作为后备
+_HEX_TABLE = [f"{i:02X}" for i in range(256)]
+
 
 def format_bytes(data):
     """格式化字节为十六进制字符串"""
-    return ' '.join(f"{b:02X}" for b in data)
+    try:
+        # 单次C调用完成整个转换 (Python 3.8+)
+        return bytes(data).hex(' ').upper()
+    except TypeError:
+        return ' '.join(_HEX_TABLE[b] for b in bytes(data))
+
+
+def sweep_feature_reports(dev, report_ids, out, valid, rows=None):
+    """
+    一次性读取所有报告到预分配的缓冲区
+
+    把 18 次 get_feature_report 集中在一个紧凑循环里完成，
+    hidapi 在系统调用期间会释放 GIL，Python 层只在每轮结束后处理一次数据。
+
+    Args:
+        dev: 已打开的HID设备
+        report_ids: 要读取的Report ID列表
+        out: 预分配的 (len(report_ids), FEATURE_LENGTH) uint8 数组
+        valid: 预分配的 bool 数组，标记哪些报告读取成功
+        rows: 只探测这些行号 (None = 探测全部)
+    """
+    valid[:] = False
+    if rows is None:
+        rows = range(len(report_ids))
+    for i in rows:
+        try:
+            data = read_feature_report(dev, report_ids[i], FEATURE_LENGTH + 1)
+        except OSError:
+            # 报告不可用，跳过
+            continue
+        if data and len(data) > 1:
+            payload = memoryview(data)[1:]
+            out[i, :] = 0
+            out[i, :len(payload)] = np.frombuffer(payload, dtype=np.uint8)
+            valid[i] = True
+
+
+def _input_report_listener(dev, stop):
+    """
+    后台监听中断输入报告
+
+    特征报告轮询只能看到快照，设备主动推送的输入报告会被完全错过；
+    这个线程阻塞在 dev.read 上，有异步通知时立刻打印出来。
+    """
+    while not stop.is_set():
+        try:
+            data = dev.read(FEATURE_LENGTH + 1, 1000)
+        except OSError:
+            break
+        if data:
+            print(f"\n📥 [输入报告] {time.strftime('%H:%M:%S')}: {format_bytes(data)}")
 
 
 def monitor_device(poll_interval=0.5):
@@ -39,7 +103,7 @@ def monitor_device(poll_interval=0.5):
     print("="*70)
     print("HID设备监控工具")
     print("="*70)
-    print(f"\n设备: {DEVICE_PATH.decode('utf-8', errors='replace')}")
+    print(f"\n设备: {DEVICE_PATH_STR}")
     print(f"监控的Report IDs: {[f'0x{rid:02X}' for rid in MONITOR_REPORTS]}")
     print(f"轮询间隔: {poll_interval} 秒")
     print("\n说明:")
@@ -50,59 +114,81 @@ def monitor_device(poll_interval=0.5):
     print("="*70)
 
     dev = hid.device()
+    listener = None
+    listener_stop = threading.Event()
 
     try:
         dev.open_path(DEVICE_PATH)
         print("\n✓ 设备已打开\n")
 
-        # 存储上一次的数据，用于检测变化
-        last_data = {}
+        # 并行监听设备主动推送的输入报告
+        listener = threading.Thread(
+            target=_input_report_listener, args=(dev, listener_stop), daemon=True
+        )
+        listener.start()
+
+        # 预分配当前/上一次数据缓冲区，轮询期间不再分配新对象
+        num_reports = len(MONITOR_REPORTS)
+        curr_data = np.zeros((num_reports, FEATURE_LENGTH), dtype=np.uint8)
+        last_data = np.zeros((num_reports, FEATURE_LENGTH), dtype=np.uint8)
+        curr_valid = np.zeros(num_reports, dtype=bool)
+        last_valid = np.zeros(num_reports, dtype=bool)
 
         iteration = 0
+        # 设备支持的Report行号；None 表示本轮探测全部
+        live_rows = None
 
         while True:
             iteration += 1
-            print(f"\n[轮询 #{iteration}] {time.strftime('%H:%M:%S')}")
-            print("-" * 70)
-
-            changes_detected = False
-
-            for report_id in MONITOR_REPORTS:
-                try:
-                    # 读取特征报告
-                    data = dev.get_feature_report(report_id, FEATURE_LENGTH + 1)
-
-                    if data and len(data) > 1:
-                        payload = bytes(data[1:])
-
-                        # 检查是否有变化
-                        if report_id in last_data:
-                            if payload != last_data[report_id]:
-                                # 检测到变化
-                                changes_detected = True
-                                print(f"\n🔄 Report 0x{report_id:02X} 数据已改变!")
-                                print(f"   旧: {format_bytes(last_data[report_id])}")
-                                print(f"   新: {format_bytes(payload)}")
-
-                                # 分析差异
-                                old = last_data[report_id]
-                                for i, (old_byte, new_byte) in enumerate(zip(old, payload)):
-                                    if old_byte != new_byte:
-                                        print(f"      byte[{i}]: 0x{old_byte:02X} → 0x{new_byte:02X} "
-                                              f"({old_byte} → {new_byte})")
-                        else:
-                            # 首次获取
-                            print(f"Report 0x{report_id:02X}: {format_bytes(payload)}")
-
-                        # 更新存储
-                        last_data[report_id] = payload
-
-                except OSError:
-                    # 报告不可用，跳过
-                    pass
-
-            if not changes_detected and iteration > 1:
-                print("   (无变化)")
+            # 本轮所有输出先写进内存缓冲，结束时一次性刷给终端，
+            # 把每轮几十次控制台系统调用合并成一次
+            out = io.StringIO()
+            out.write(f"\n[轮询 #{iteration}] {time.strftime('%H:%M:%S')}\n")
+            out.write("-" * 70 + "\n")
+
+            # 定期全量重扫，捕捉新出现的报告
+            if live_rows is not None and iteration % RESCAN_EVERY == 0:
+                live_rows = None
+
+            # 一次扫描：首轮探测全部报告，之后只读设备实际支持的
+            sweep_feature_reports(dev, MONITOR_REPORTS, curr_data, curr_valid, live_rows)
+
+            # 向量化变化检测：一次比较所有报告的所有字节
+            changed_mask = curr_valid & last_valid & (curr_data != last_data).any(axis=1)
+            first_seen_mask = curr_valid & ~last_valid
+
+            for idx in np.flatnonzero(first_seen_mask):
+                # 首次获取
+                out.write(f"Report 0x{MONITOR_REPORTS[idx]:02X}: {format_bytes(curr_data[idx])}\n")
+
+            for idx in np.flatnonzero(changed_mask):
+                report_id = MONITOR_REPORTS[idx]
+                out.write(f"\n🔄 Report 0x{report_id:02X} 数据已改变!\n")
+                out.write(f"   旧: {format_bytes(last_data[idx])}\n")
+                out.write(f"   新: {format_bytes(curr_data[idx])}\n")
+
+                # 分析差异：XOR 后只遍历真正变化的字节
+                diff = np.flatnonzero(curr_data[idx] ^ last_data[idx])
+                for i in diff.tolist():
+                    old_byte = last_data[idx, i]
+                    new_byte = curr_data[idx, i]
+                    out.write(f"      byte[{i}]: 0x{old_byte:02X} → 0x{new_byte:02X} "
+                              f"({old_byte} → {new_byte})\n")
+
+            if not changed_mask.any() and iteration > 1:
+                out.write("   (无变化)\n")
+
+            sys.stdout.write(out.getvalue())
+            sys.stdout.flush()
+
+            # 只覆盖本轮读取成功的行，读取失败的报告保留上一次的数据
+            np.copyto(last_data, curr_data, where=curr_valid[:, None])
+            last_valid |= curr_valid
+
+            # 全量扫描之后，把探测范围收窄到曾经成功过的Report
+            # (一个都没成功时保持全量探测)
+            if live_rows is None:
+                live_rows = np.flatnonzero(last_valid).tolist() or None
 
             time.sleep(poll_interval)
 
@@ -112,6 +198,11 @@ def monitor_device(poll_interval=0.5):
         print(f"\n错误: {e}")
         sys.exit(1)
     finally:
+        listener_stop.set()
+        if listener is not None:
+            # 监听线程最长阻塞在 1 秒超时的 dev.read 里；等它退出后再关闭句柄，
+            # 避免 hid_close 与正在进行的读取并发（hidapi 对此不是线程安全的）
+            listener.join(timeout=1.5)
         dev.close()
         print("设备已关闭")
 
@@ -144,66 +235,64 @@ def capture_snapshots(num_snapshots=5, interval=2.0):
         dev.open_path(DEVICE_PATH)
         print("\n✓ 设备已打开\n")
 
-        snapshots = []
+        # 所有快照写入同一块预分配数组，常驻内存不随快照数量增长出 Python 对象
+        num_reports = len(MONITOR_REPORTS)
+        snap_data = np.zeros((num_snapshots, num_reports, FEATURE_LENGTH), dtype=np.uint8)
+        snap_valid = np.zeros((num_snapshots, num_reports), dtype=bool)
+        snap_times = []
 
         for i in range(num_snapshots):
-            countdown = interval
-            while countdown > 0:
-                print(f"\r快照 {i+1}/{num_snapshots} 将在 {countdown:.1f} 秒后捕获...", end='')
-                time.sleep(0.1)
-                countdown -= 0.1
+            # 用单调时钟的绝对截止时间计时，避免 0.1 秒累减带来的浮点漂移，
+            # 也把倒计时的唤醒次数从每秒 10 次降到最多 4 次
+            deadline = time.monotonic() + interval
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                print(f"\r快照 {i+1}/{num_snapshots} 将在 {remaining:.1f} 秒后捕获...", end='', flush=True)
+                time.sleep(min(0.25, remaining))
 
             print(f"\r{'✓ 捕获快照 ' + str(i+1):<50}")
 
-            snapshot = {}
-            for report_id in MONITOR_REPORTS:
-                try:
-                    data = dev.get_feature_report(report_id, FEATURE_LENGTH + 1)
-                    if data and len(data) > 1:
-                        snapshot[report_id] = bytes(data[1:])
-                except OSError:
-                    pass
-
-            snapshots.append({
-                'time': time.strftime('%H:%M:%S'),
-                'data': snapshot
-            })
+            sweep_feature_reports(dev, MONITOR_REPORTS, snap_data[i], snap_valid[i])
+            snap_times.append(time.strftime('%H:%M:%S'))
 
         # 分析快照
         print("\n" + "="*70)
         print("快照分析")
         print("="*70)
 
-        for i, snap in enumerate(snapshots):
-            print(f"\n快照 {i+1} ({snap['time']}):")
-            for rid, payload in snap['data'].items():
-                print(f"  Report 0x{rid:02X}: {format_bytes(payload)}")
+        for i, snap_time in enumerate(snap_times):
+            print(f"\n快照 {i+1} ({snap_time}):")
+            for k in np.flatnonzero(snap_valid[i]):
+                print(f"  Report 0x{MONITOR_REPORTS[k]:02X}: {format_bytes(snap_data[i, k])}")
 
         # 对比第一个和最后一个快照
-        if len(snapshots) >= 2:
+        if len(snap_times) >= 2:
             print("\n" + "="*70)
             print("差异分析 (第一个 vs 最后一个快照)")
             print("="*70)
 
-            first = snapshots[0]['data']
-            last = snapshots[-1]['data']
-
-            all_rids = set(first.keys()) | set(last.keys())
-
-            for rid in sorted(all_rids):
-                if rid in first and rid in last:
-                    if first[rid] != last[rid]:
-                        print(f"\nReport 0x{rid:02X} 已改变:")
-                        print(f"  初始: {format_bytes(first[rid])}")
-                        print(f"  最终: {format_bytes(last[rid])}")
-
-                        # 字节级差异
-                        for i, (old, new) in enumerate(zip(first[rid], last[rid])):
-                            if old != new:
-                                print(f"    byte[{i}]: 0x{old:02X} → 0x{new:02X}")
-                elif rid in last and rid not in first:
-                    print(f"\nReport 0x{rid:02X} 新出现:")
-                    print(f"  数据: {format_bytes(last[rid])}")
+            first_data, last_data = snap_data[0], snap_data[-1]
+            first_valid, last_valid = snap_valid[0], snap_valid[-1]
+
+            # 向量化：一次比较所有报告，只遍历真正变化的
+            changed = first_valid & last_valid & (first_data != last_data).any(axis=1)
+            appeared = last_valid & ~first_valid
+
+            for k in np.flatnonzero(changed):
+                rid = MONITOR_REPORTS[k]
+                print(f"\nReport 0x{rid:02X} 已改变:")
+                print(f"  初始: {format_bytes(first_data[k])}")
+                print(f"  最终: {format_bytes(last_data[k])}")
+
+                # 字节级差异：XOR 后只遍历变化的位置
+                for i in np.flatnonzero(first_data[k] ^ last_data[k]).tolist():
+                    print(f"    byte[{i}]: 0x{first_data[k, i]:02X} → 0x{last_data[k, i]:02X}")
+
+            for k in np.flatnonzero(appeared):
+                print(f"\nReport 0x{MONITOR_REPORTS[k]:02X} 新出现:")
+                print(f"  数据: {format_bytes(last_data[k])}")
 
     except KeyboardInterrupt:
         print("\n\n快照捕获已停止")
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Small helpers shared between the HID battery scripts."""
+
+import threading
+
+# Reusable receive buffers for bindings that can write into a caller-provided
+# buffer (newer cython-hidapi exposes get_feature_report_into). Thread-local
+# because the scripts read from worker threads as well as the main thread.
+_local = threading.local()
+
+
+def read_feature_report(dev, report_id: int, length: int):
+    """
+    Read a feature report with as little per-call allocation as the binding allows.
+
+    Returns a memoryview over a reused thread-local buffer when the binding
+    supports get_feature_report_into, otherwise bytes. Either way the result
+    supports len(), indexing and slicing; callers that keep the data across
+    reads must copy it (bytes(result)).
+    """
+    into = getattr(dev, "get_feature_report_into", None)
+    if into is not None:
+        buf = getattr(_local, "rx", None)
+        if buf is None or len(buf) < length:
+            buf = _local.rx = bytearray(max(length, 65))
+        n = into(report_id, buf)
+        return memoryview(buf)[:n]
+    # Stock API returns list[int]; convert immediately so the boxed ints are
+    # released right away instead of being retained by callers.
+    data = dev.get_feature_report(report_id, length)
+    return data if isinstance(data, (bytes, bytearray)) else bytes(data)
+
+
+def as_bytes(data) -> bytes:
+    """Normalise hidapi's list-of-ints return into bytes (no-op if already bytes)."""
+    return data if isinstance(data, (bytes, bytearray)) else bytes(data)
+
+
+def to_int(value: str) -> int:
+    """Parse decimal or hexadecimal CLI integers (0x1234 / 1234 / 1234h)."""
+    s = value.strip()
+    if s[-1:].lower() == "h":
+        return int(s[:-1], 16)
+    # int() with base 0 natively accepts 0x/0o/0b prefixes and plain decimal,
+    # but rejects zero-padded decimals like "07" -- fall back to base 10.
+    try:
+        return int(s, 0)
+    except ValueError:
+        return int(s, 10)
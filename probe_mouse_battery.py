@@ -22,15 +22,23 @@ rules or sudo; on Windows you might have to run inside an admin shell.
 import argparse
 import sys
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Iterable, List, Optional, Sequence
 
+try:
+    import numpy as np
+except ImportError as exc:  # pragma: no cover - only triggered when dependency missing
+    print("This script needs the 'numpy' package. Install it via 'pip install numpy'.")
+    raise SystemExit(1) from exc
+
 try:
     import hid  # type: ignore
 except ImportError as exc:  # pragma: no cover - only triggered when dependency missing
     print("This script needs the 'hidapi' package. Install it via 'pip install hidapi'.")
     raise SystemExit(1) from exc
 
+from hid_utils import as_bytes as _as_bytes, read_feature_report, to_int as _to_int
+
 
 DEFAULT_REPORT_IDS: Sequence[int] = (
     0x00,
@@ -54,19 +62,6 @@ DEFAULT_REPORT_IDS: Sequence[int] = (
 )
 
 
-def _to_int(value: str) -> int:
-    """Parse integer values from CLI, accepting decimal or hex (with/without 0x)."""
-    base = 10
-    cleaned = value.strip().lower()
-    if cleaned.startswith("0x"):
-        base = 16
-        cleaned = cleaned[2:]
-    elif cleaned.endswith("h"):
-        base = 16
-        cleaned = cleaned[:-1]
-    return int(cleaned, base)
-
-
 def list_hid_devices() -> None:
     """Enumerate HID devices and print a quick summary."""
     devices = list(hid.enumerate())
@@ -97,7 +92,7 @@ def list_hid_devices() -> None:
             print(f"     usage_page=0x{usage_page:04X} usage=0x{usage:04X}")
 
 
-def decode_battery_candidates(payload: Sequence[int]) -> List[str]:
+def decode_battery_candidates(payload: bytes) -> List[str]:
     """
     Try to spot bytes that could represent battery level.
 
@@ -105,30 +100,26 @@ def decode_battery_candidates(payload: Sequence[int]) -> List[str]:
       - values 1..100 → likely direct percentage
       - values 1..254 → interpret as 0..255 scalar
     """
-    hints: List[str] = []
-    seen = set()
-    for idx, val in enumerate(payload):
-        if val <= 0:
-            continue
-
-        label_direct = f"byte{idx}={val}%"
-        if val <= 100 and label_direct not in seen:
-            hints.append(f"{label_direct} (0-100 scale)")
-            seen.add(label_direct)
-            continue
+    p = np.frombuffer(_as_bytes(payload), dtype=np.uint8)
+    idx_pct = np.flatnonzero((p > 0) & (p <= 100))
+    idx_scaled = np.flatnonzero(p > 100)
+    hints = [f"byte{i}={p[i]}% (0-100 scale)" for i in idx_pct]
+    hints += [
+        f"byte{i}=0x{p[i]:02X} (~{p[i] * 100.0 / 255.0:.1f}% on 0-255 scale)"
+        for i in idx_scaled
+    ]
+    return hints
 
-        label_scaled = f"byte{idx}=0x{val:02X}"
-        if label_scaled in seen:
-            continue
-        pct = val * 100.0 / 255.0
-        hints.append(f"{label_scaled} (~{pct:.1f}% on 0-255 scale)")
-        seen.add(label_scaled)
 
-    return hints
+# Precomputed lookup table; fallback for Python < 3.8 where bytes.hex() has no sep.
+_HEX_TABLE = [f"{i:02X}" for i in range(256)]
 
 
 def format_bytes(buf: Sequence[int]) -> str:
-    return " ".join(f"{b:02X}" for b in buf)
+    try:
+        return bytes(buf).hex(" ").upper()
+    except TypeError:
+        return " ".join(_HEX_TABLE[b] for b in bytes(buf))
 
 
 @dataclass
@@ -142,6 +133,10 @@ class ProbeConfig:
     poll: float
     quiet_errors: bool
     send: Sequence[bytes]
+    rescan_every: int = 0
+    # Report IDs that failed every attempt of a sweep; skipped on later sweeps
+    # when quiet_errors is set.
+    dead_rids: set = field(default_factory=set)
 
 
 def open_device(cfg: ProbeConfig) -> hid.device:
@@ -171,11 +166,25 @@ def parse_send_packets(hex_values: Optional[Sequence[str]]) -> Sequence[bytes]:
 
 
 def probe_once(dev: hid.device, cfg: ProbeConfig) -> None:
+    """
+    Read each configured report ID once (or cfg.tries times).
+
+    Under --quiet-errors, report IDs that fail every attempt are recorded in
+    cfg.dead_rids and skipped on later sweeps, saving both the syscall
+    round-trip and the exception overhead for IDs the device provably does not
+    implement. --rescan-every clears the set periodically in case new reports
+    appear (e.g. after --send payloads wake the device).
+    """
+    track_dead = cfg.quiet_errors
     for rid in cfg.report_ids:
+        if track_dead and rid in cfg.dead_rids:
+            continue
+        failures = 0
         for attempt in range(cfg.tries):
             try:
-                data = dev.get_feature_report(rid, cfg.feature_length + 1)
+                data = read_feature_report(dev, rid, cfg.feature_length + 1)
             except OSError as exc:
+                failures += 1
                 if not cfg.quiet_errors:
                     err_info = f"{exc}"
                     if getattr(exc, "errno", None):
@@ -187,14 +196,18 @@ def probe_once(dev: hid.device, cfg: ProbeConfig) -> None:
                 print(f"[Report 0x{rid:02X}] attempt {attempt + 1}: empty response")
                 continue
 
-            report_id = data[0]
-            payload = data[1:]
+            buf = _as_bytes(data)
+            report_id = buf[0]
+            payload = buf[1:]
             print(f"[Report 0x{rid:02X}] attempt {attempt + 1}: id=0x{report_id:02X} "
                   f"payload({len(payload)}B)={format_bytes(payload)}")
             hints = decode_battery_candidates(payload)
             if hints:
                 print("    heuristics: " + "; ".join(hints))
 
+        if track_dead and failures == cfg.tries:
+            cfg.dead_rids.add(rid)
+
 
 def run_probe(cfg: ProbeConfig) -> None:
     dev: Optional[hid.device] = None
@@ -210,9 +223,13 @@ def run_probe(cfg: ProbeConfig) -> None:
 
         if cfg.poll > 0:
             print(f"Polling every {cfg.poll} second(s); press Ctrl+C to stop.")
+            sweeps = 0
             try:
                 while True:
                     probe_once(dev, cfg)
+                    sweeps += 1
+                    if cfg.rescan_every > 0 and sweeps % cfg.rescan_every == 0:
+                        cfg.dead_rids.clear()
                     time.sleep(cfg.poll)
             except KeyboardInterrupt:
                 print("\nStopped by user.")
@@ -268,7 +285,16 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     parser.add_argument(
         "--quiet-errors",
         action="store_true",
-        help="Suppress repeated OSError messages when a report ID is unsupported.",
+        help="Suppress repeated OSError messages when a report ID is unsupported, "
+        "and stop re-polling IDs that failed a whole sweep.",
+    )
+    parser.add_argument(
+        "--rescan-every",
+        type=int,
+        default=0,
+        metavar="N",
+        help="With --quiet-errors, retry known-dead report IDs every N sweeps "
+        "(0 = never rescan).",
     )
     parser.add_argument(
         "--send",
@@ -305,6 +331,7 @@ def build_config(args: argparse.Namespace) -> ProbeConfig:
         poll=args.poll,
         quiet_errors=args.quiet_errors,
         send=send_packets,
+        rescan_every=max(args.rescan_every, 0),
     )
 
 
@@ -8,7 +8,11 @@ requests feature report 0xF7 and prints the third payload byte which tracks the
 """
 
 import argparse
+import json
+import os
+import queue
 import sys
+import threading
 import time
 from typing import Optional
 
@@ -18,6 +22,8 @@ except ImportError as exc:  # pragma: no cover - dependency check only
     print("This script needs the 'hidapi' package. Install it via 'pip install hidapi'.")
     raise SystemExit(1) from exc
 
+from hid_utils import as_bytes as _as_bytes, read_feature_report, to_int as _to_int
+
 
 # Path gathered from USBPcap/Wireshark while the vendor driver was running.
 DEFAULT_ANGRY_MIAO_PATH = (
@@ -27,25 +33,17 @@ DEFAULT_VENDOR_ID = 0x3151
 DEFAULT_PRODUCT_ID = 0x5007
 
 # First byte is the report ID (0), the remaining 64 bytes match the payload captured
-# from the official software via USBPcap/Wireshark.
-ANGRY_MIAO_INIT_FEATURE = bytes([0x00, 0xF7] + [0x00] * 63)
+# from the official software via USBPcap/Wireshark. Built from a zeroed
+# bytearray instead of a 65-element int list; variants only need to poke the
+# bytes that differ.
+_init = bytearray(65)
+_init[1] = 0xF7
+ANGRY_MIAO_INIT_FEATURE = bytes(_init)
+del _init
 ANGRY_MIAO_REPORT_ID = 0xF7
 DEFAULT_BUFFER_LENGTH = 65  # report ID + 64 payload bytes
 
 
-def _to_int(value: str) -> int:
-    """Parse decimal or hexadecimal CLI integers (0x1234 / 1234 / 1234h)."""
-    cleaned = value.strip().lower()
-    base = 10
-    if cleaned.startswith("0x"):
-        cleaned = cleaned[2:]
-        base = 16
-    elif cleaned.endswith("h"):
-        cleaned = cleaned[:-1]
-        base = 16
-    return int(cleaned, base)
-
-
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Read Angry Miao mouse battery percentage via HID feature reports."
@@ -75,6 +73,12 @@ def parse_args() -> argparse.Namespace:
         default=0.05,
         help="Delay in seconds between init packet and read operations.",
     )
+    parser.add_argument(
+        "--input-report",
+        action="store_true",
+        help="Wait for battery updates on the interrupt IN pipe instead of "
+        "polling feature reports (falls back to polling if none arrive).",
+    )
     parser.add_argument(
         "--quiet",
         action="store_true",
@@ -121,32 +125,101 @@ def _decode_path(raw_path: object) -> Optional[str]:
     return None
 
 
+# Resolved device paths are stable across reboots, so cache them on disk and
+# skip the full hid.enumerate() walk (20-50ms on HID-heavy Windows systems).
+_CACHE_DIR = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+_CACHE_PATH = os.path.join(_CACHE_DIR, "angrymiao", "device_path.json")
+
+
+def _cached_path_matches(vid: int, pid: int, path: str) -> bool:
+    """
+    Check that a cached path still refers to the requested VID/PID.
+
+    Windows HID paths embed the IDs, so a substring check suffices. Paths that
+    do not (e.g. /dev/hidrawN, whose node names are recycled across replugs)
+    need a filtered enumeration to confirm the device behind them is still the
+    one we cached - merely opening successfully proves nothing.
+    """
+    lowered = path.lower()
+    if f"vid_{vid:04x}" in lowered and f"pid_{pid:04x}" in lowered:
+        return True
+    return any(
+        _decode_path(dev_info.get("path")) == path for dev_info in hid.enumerate(vid, pid)
+    )
+
+
+def _load_cached_path(vid: int, pid: int) -> Optional[str]:
+    try:
+        with open(_CACHE_PATH, "r", encoding="utf-8") as fh:
+            cache = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    path = cache.get(f"{vid:04x}:{pid:04x}")
+    if not isinstance(path, str) or not path:
+        return None
+    if not _cached_path_matches(vid, pid, path):
+        return None
+    # Verify the cached path still points at an openable device.
+    dev = hid.device()
+    try:
+        dev.open_path(path.encode("utf-8"))
+    except OSError:
+        return None
+    dev.close()
+    return path
+
+
+def _store_cached_path(vid: int, pid: int, path: str) -> None:
+    # Best effort: a failed cache write just means enumerating again next run.
+    try:
+        os.makedirs(os.path.dirname(_CACHE_PATH), exist_ok=True)
+        try:
+            with open(_CACHE_PATH, "r", encoding="utf-8") as fh:
+                cache = json.load(fh)
+        except (OSError, ValueError):
+            cache = {}
+        cache[f"{vid:04x}:{pid:04x}"] = path
+        with open(_CACHE_PATH, "w", encoding="utf-8") as fh:
+            json.dump(cache, fh)
+    except OSError:
+        pass
+
+
 def find_device_path(vid: int, pid: int) -> Optional[str]:
     """
-    Locate a HID path for the given VID/PID combination.
+    Locate a HID path for the given VID/PID combination, preferring a cached
+    path from a previous run over a fresh enumeration.
     """
-    matches: list[tuple[str, dict]] = []
-    for dev_info in hid.enumerate(vid, pid):
-        path = _decode_path(dev_info.get("path"))
-        if not path:
-            continue
-        matches.append((path, dev_info))
+    cached = _load_cached_path(vid, pid)
+    if cached:
+        return cached
 
+    path = _enumerate_device_path(vid, pid)
+    if path:
+        _store_cached_path(vid, pid, path)
+    return path
+
+
+def _enumerate_device_path(vid: int, pid: int) -> Optional[str]:
+    """
+    Walk hid.enumerate() output for the given VID/PID combination.
+    """
+    matches = [
+        (path, dev_info)
+        for dev_info in hid.enumerate(vid, pid)
+        if (path := _decode_path(dev_info.get("path")))
+    ]
     if not matches:
         return None
 
     # Prefer interface #2 (battery endpoint), fall back to the first match.
     for path, dev_info in matches:
-        interface_no = dev_info.get("interface_number")
-        if interface_no == 2:
+        if dev_info.get("interface_number") == 2:
+            return path
+    for path, _ in matches:
+        if "mi_02" in path.lower():
             return path
-
-    lower_matches = [(path, dev_info) for path, dev_info in matches if "mi_02" in path.lower()]
-    if lower_matches:
-        return lower_matches[0][0]
-
     return matches[0][0]
-    return None
 
 
 def open_device(path: Optional[str], vid: Optional[int], pid: Optional[int]) -> hid.device:
@@ -178,7 +251,7 @@ def query_battery(dev: hid.device, delay: float, retry: int, quiet: bool) -> Opt
             time.sleep(delay)
 
         try:
-            data = dev.get_feature_report(ANGRY_MIAO_REPORT_ID, DEFAULT_BUFFER_LENGTH)
+            data = read_feature_report(dev, ANGRY_MIAO_REPORT_ID, DEFAULT_BUFFER_LENGTH)
         except OSError as exc:
             if not quiet:
                 print(f"[attempt {attempt}] Failed to read report 0x{ANGRY_MIAO_REPORT_ID:02X}: {exc}")
@@ -190,13 +263,79 @@ def query_battery(dev: hid.device, delay: float, retry: int, quiet: bool) -> Opt
                 print(f"[attempt {attempt}] Unexpected report format: {payload_hex}")
             continue
 
-        payload = data[1:]
-        battery = payload[2]
-        return battery
+        # Battery sits at payload offset 2, i.e. data[3]; index the raw report
+        # directly instead of slicing a fresh 64-byte payload on every poll.
+        return data[3]
 
     return None
 
 
+def watch_input_reports(dev: hid.device, delay: float, quiet: bool) -> bool:
+    """
+    Print battery updates delivered spontaneously on the interrupt IN pipe.
+
+    Blocking in dev.read() leaves the process asleep in the kernel until the
+    device actually emits a report, so there are no polling syscalls between
+    genuine battery changes. Returns False if the device never sends input
+    reports, letting the caller fall back to feature-report polling.
+    """
+    try:
+        dev.send_feature_report(ANGRY_MIAO_INIT_FEATURE)
+    except OSError as exc:
+        if not quiet:
+            print(f"Failed to send init report: {exc}")
+        return False
+
+    if delay > 0:
+        time.sleep(delay)
+
+    dev.set_nonblocking(0)
+    got_any = False
+    while True:
+        try:
+            data = _as_bytes(dev.read(DEFAULT_BUFFER_LENGTH, timeout_ms=60000))
+        except OSError as exc:
+            if not quiet:
+                print(f"Input-report read failed: {exc}")
+            return got_any
+        if not data:
+            if got_any:
+                continue  # quiet spell between updates; keep waiting
+            if not quiet:
+                print("No input reports within 60s; falling back to feature polling.")
+            return False
+        if len(data) >= 4 and data[0] == ANGRY_MIAO_REPORT_ID:
+            print(f"{data[3]}")
+            got_any = True
+
+
+def _battery_worker(
+    dev: hid.device,
+    delay: float,
+    retry: int,
+    quiet: bool,
+    poll: float,
+    readings: "queue.Queue[Optional[int]]",
+    stop: threading.Event,
+) -> None:
+    """
+    Poll the battery on a dedicated thread, keeping only the freshest reading.
+
+    hidapi (cython-hidapi >= 0.7) releases the GIL inside send/get_feature_report,
+    so the main thread stays responsive (Ctrl+C, future exporters) while a read
+    is in flight.
+    """
+    while not stop.is_set():
+        battery = query_battery(dev, delay, retry, quiet)
+        try:
+            readings.get_nowait()  # evict a stale reading nobody consumed
+        except queue.Empty:
+            pass
+        readings.put(battery)
+        if stop.wait(poll):
+            break
+
+
 def main() -> int:
     args = parse_args()
     try:
@@ -207,18 +346,45 @@ def main() -> int:
         return 1
 
     try:
+        if args.input_report:
+            try:
+                if watch_input_reports(dev, args.delay, args.quiet):
+                    return 0
+            except KeyboardInterrupt:
+                return 0
+            # Device stayed silent on the interrupt pipe; fall through to the
+            # feature-report paths below.
+
         if args.poll > 0:
+            readings: "queue.Queue[Optional[int]]" = queue.Queue(maxsize=1)
+            stop = threading.Event()
+            worker = threading.Thread(
+                target=_battery_worker,
+                args=(dev, args.delay, args.retry, args.quiet, args.poll, readings, stop),
+                daemon=True,
+            )
+            worker.start()
             try:
                 while True:
-                    battery = query_battery(dev, args.delay, args.retry, args.quiet)
+                    try:
+                        battery = readings.get(timeout=max(args.poll * 2, 1.0))
+                    except queue.Empty:
+                        if not args.quiet:
+                            print("Battery read timed out.")
+                        return 1
                     if battery is None:
                         if not args.quiet:
                             print("Battery read failed.")
                         return 1
                     print(f"{battery}")
-                    time.sleep(args.poll)
             except KeyboardInterrupt:
                 return 0
+            finally:
+                stop.set()
+                # Wait for the worker to leave its current HID call before the
+                # outer finally closes the handle: hidapi is not safe against
+                # hid_close racing an in-flight send/get_feature_report.
+                worker.join(timeout=max(args.poll * 2, 2.0))
         else:
             battery = query_battery(dev, args.delay, args.retry, args.quiet)
             if battery is None:
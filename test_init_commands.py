@@ -4,11 +4,16 @@
 """
 
 import hid
+import threading
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from hid_utils import as_bytes as _as_bytes, read_feature_report
 
 # 你的设备路径
 DEVICE_PATH = b"\\\\?\\HID#VID_3151&PID_5007&MI_02#8&512c24e&0&0000#{4d1e55b2-f16f-11cf-88cb-001111000030}"
+DEVICE_PATH_STR = DEVICE_PATH.decode('utf-8', errors='replace')
 
 # 常见的HID初始化命令模式
 INIT_COMMANDS = [
@@ -37,15 +42,46 @@ INIT_COMMANDS = [
 ]
 
 
+# 预生成的十六进制查找表，Python < 3.8 没有 bytes.hex(sep) 时作为后备
+_HEX_TABLE = [f"{i:02X}" for i in range(256)]
+
+# 并发探测用：每个工作线程打开自己的设备句柄
+_thread_local = threading.local()
+_thread_devices = []
+_thread_devices_lock = threading.Lock()
+
+
+def _get_thread_device():
+    """返回当前线程专属的设备句柄，首次调用时打开"""
+    dev = getattr(_thread_local, 'dev', None)
+    if dev is None:
+        dev = hid.device()
+        dev.open_path(DEVICE_PATH)
+        _thread_local.dev = dev
+        with _thread_devices_lock:
+            _thread_devices.append(dev)
+    return dev
+
+
+def _probe_command_threaded(description, command):
+    return probe_command(_get_thread_device(), description, command)
+
+
 def format_bytes(data):
     """格式化字节为十六进制字符串"""
-    return ' '.join(f"{b:02X}" for b in data)
+    try:
+        # 单次C调用完成整个转换 (Python 3.8+)
+        return bytes(data).hex(' ').upper()
+    except TypeError:
+        return ' '.join(_HEX_TABLE[b] for b in bytes(data))
 
 
-def test_command(dev, description, command, target_report_id=0x3F, feature_length=64):
+def probe_command(dev, description, command, target_report_id=0x3F, feature_length=64):
     """
     测试单个初始化命令
 
+    为了支持多线程并发探测，输出先收集成文本，由调用方一次性打印。
+
     Args:
         dev: HID设备对象
         description: 命令描述
@@ -54,66 +90,71 @@ def test_command(dev, description, command, target_report_id=0x3F, feature_lengt
         feature_length: 特征报告长度
 
     Returns:
-        bool: 是否成功获取有效数据
+        (bool, str): 是否成功获取有效数据，以及完整的探测输出
     """
-    print(f"\n{'='*60}")
-    print(f"测试: {description}")
-    print(f"命令: {format_bytes(command)}")
-    print(f"{'='*60}")
+    lines = []
+    lines.append(f"\n{'='*60}")
+    lines.append(f"测试: {description}")
+    lines.append(f"命令: {format_bytes(command)}")
+    lines.append(f"{'='*60}")
 
     try:
         # 发送初始化命令
         written = dev.send_feature_report(command)
-        print(f"✓ 已发送 {written} 字节")
+        lines.append(f"✓ 已发送 {written} 字节")
 
         # 等待设备处理
         time.sleep(0.1)
 
         # 尝试读取目标报告
-        print(f"\n尝试读取 Report 0x{target_report_id:02X}...")
+        lines.append(f"\n尝试读取 Report 0x{target_report_id:02X}...")
 
+        # 指数退避: 5ms → 10ms → 20ms，比固定50ms更快拿到迟来的响应
+        delay = 0.005
         for attempt in range(3):
             try:
-                data = dev.get_feature_report(target_report_id, feature_length + 1)
+                data = read_feature_report(dev, target_report_id, feature_length + 1)
 
                 if data and len(data) > 1:
-                    report_id = data[0]
-                    payload = data[1:]
+                    buf = _as_bytes(data)
+                    report_id = buf[0]
+                    payload = buf[1:]
 
-                    print(f"\n✓ 成功! 尝试 {attempt + 1}:")
-                    print(f"  Report ID: 0x{report_id:02X}")
-                    print(f"  Payload ({len(payload)}B): {format_bytes(payload)}")
+                    lines.append(f"\n✓ 成功! 尝试 {attempt + 1}:")
+                    lines.append(f"  Report ID: 0x{report_id:02X}")
+                    lines.append(f"  Payload ({len(payload)}B): {format_bytes(payload)}")
 
                     # 检查 byte3 是否像电量值
                     if len(payload) >= 4:
                         battery_level = payload[3]
-                        print(f"  >>> byte3 = {battery_level} (可能的电量: {battery_level}%)")
+                        lines.append(f"  >>> byte3 = {battery_level} (可能的电量: {battery_level}%)")
 
                         # 如果byte3在合理的电量范围内，认为成功
                         if 0 < battery_level <= 100:
-                            print(f"\n🎉 找到有效命令! 电量: {battery_level}%")
-                            return True
+                            lines.append(f"\n🎉 找到有效命令! 电量: {battery_level}%")
+                            return True, "\n".join(lines)
 
             except OSError as e:
-                print(f"  尝试 {attempt + 1} 失败: {e}")
+                lines.append(f"  尝试 {attempt + 1} 失败: {e}")
 
-            time.sleep(0.05)
+            time.sleep(delay)
+            delay *= 2
 
-        print(f"\n✗ 未获取到有效数据")
-        return False
+        lines.append(f"\n✗ 未获取到有效数据")
+        return False, "\n".join(lines)
 
     except Exception as e:
-        print(f"✗ 命令发送失败: {e}")
-        return False
+        lines.append(f"✗ 命令发送失败: {e}")
+        return False, "\n".join(lines)
 
 
-def main():
+def main(parallel=False):
     print("="*60)
     print("HID设备初始化命令测试工具")
     print("="*60)
 
     # 打开设备
-    print(f"\n打开设备: {DEVICE_PATH.decode('utf-8', errors='replace')}")
+    print(f"\n打开设备: {DEVICE_PATH_STR}")
     dev = hid.device()
 
     try:
@@ -128,13 +169,48 @@ def main():
 
         successful_commands = []
 
-        # 测试所有命令
-        for description, command in INIT_COMMANDS:
-            if test_command(dev, description, command):
-                successful_commands.append((description, command))
-
-            # 短暂延迟
-            time.sleep(0.2)
+        # 并行模式只做粗筛：所有命令共享同一台设备的状态，且每条探测都读
+        # 同一个 Report 0x3F 来判断成功，任一命令唤醒设备后，其余在途探测
+        # 也会读到有效数据，成功归因不可靠。因此默认串行，--parallel 按需开启
+        can_parallel = False
+        if parallel:
+            try:
+                extra = hid.device()
+                extra.open_path(DEVICE_PATH)
+                extra.close()
+                can_parallel = True
+            except OSError:
+                print("\n设备只允许单个句柄，退回串行模式")
+
+        if can_parallel:
+            # 每条命令内部的等待都是纯I/O，hidapi读取时释放GIL，
+            # 4个工作线程并行可把整轮探测时间缩短到约1/4
+            print("\n(并行模式: 4 个工作线程)")
+            print("⚠️  并行结果仅供粗筛: 任一命令唤醒设备后，其余在途探测也会"
+                  "读到有效数据，请用默认串行模式确认具体哪条命令有效")
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                futures = {
+                    pool.submit(_probe_command_threaded, description, command): (description, command)
+                    for description, command in INIT_COMMANDS
+                }
+                for future in as_completed(futures):
+                    success, report = future.result()
+                    print(report)
+                    if success:
+                        successful_commands.append(futures[future])
+            with _thread_devices_lock:
+                for worker_dev in _thread_devices:
+                    worker_dev.close()
+                _thread_devices.clear()
+        else:
+            # 串行测试所有命令；命令内部的 100ms 等待加 5/10/20ms 退避重试
+            # (约135ms)，且每次 get/send 本身就是一次同步的设备往返，
+            # 已足够给设备留出处理时间，命令之间无需额外停顿
+            for description, command in INIT_COMMANDS:
+                success, report = probe_command(dev, description, command)
+                print(report)
+                if success:
+                    successful_commands.append((description, command))
 
         # 总结
         print("\n" + "="*60)
@@ -148,6 +224,8 @@ def main():
                 print(f"    命令: {format_bytes(cmd)}")
                 print(f"    使用方法: --send \"{format_bytes(cmd)}\"")
                 print()
+            if can_parallel:
+                print("  (并行模式下成功归因不可靠，请用串行模式逐一确认)")
         else:
             print("\n✗ 未找到有效的初始化命令")
             print("\n建议:")
@@ -164,4 +242,11 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="HID设备初始化命令测试工具")
+    parser.add_argument('--parallel', action='store_true',
+                        help='并行探测（更快，但成功归因不可靠，仅用于粗筛）')
+
+    args = parser.parse_args()
+    main(parallel=args.parallel)